@@ -6,6 +6,7 @@ This script analyzes JSON data generated by either the Spotify or Apple Music pl
 It automatically detects the format and adjusts the analysis accordingly.
 """
 
+import gzip
 import json
 import pandas as pd
 from pathlib import Path
@@ -25,10 +26,16 @@ def detect_platform(data):
     return 'unknown'
 
 def load_playlist_data(json_file_path):
-    """Load playlist data from JSON file."""
-    with open(json_file_path, 'r', encoding='utf-8') as f:
+    """Load playlist data from a JSON file (plain or gzipped)."""
+    opener = gzip.open if str(json_file_path).endswith('.gz') else open
+    with opener(json_file_path, 'rt', encoding='utf-8') as f:
         data = json.load(f)
     
+    # Tracks may have been written to a separate Parquet file next to the JSON
+    if 'tracks_file' in data:
+        tracks_path = Path(json_file_path).parent / data['tracks_file']
+        data['tracks'] = pd.read_parquet(tracks_path).to_dict('records')
+    
     platform = detect_platform(data)
     return data, platform
 
@@ -59,7 +66,8 @@ def analyze_playlist(data, platform):
     if platform == 'spotify':
         print(f"🎤 Unique Artists: {summary.get('unique_primary_artists', summary.get('unique_artists', 0))}")
         print(f"🎤 All Artists (incl. features): {summary.get('unique_all_artists', 0)}")
-        print(f"⭐ Average Popularity: {summary.get('average_popularity', 0):.1f}")
+        average_popularity = summary.get('average_popularity')  # None for an empty playlist
+        print(f"⭐ Average Popularity: {average_popularity:.1f}" if average_popularity is not None else "⭐ Average Popularity: n/a")
         print(f"🔞 Explicit Tracks: {summary.get('explicit_tracks', 0)}")
     else:
         print(f"🎤 Unique Artists: {summary.get('unique_artists', 0)}")
@@ -68,6 +76,10 @@ def analyze_playlist(data, platform):
     print(f"💿 Unique Albums: {summary.get('unique_albums', 0)}")
     print()
     
+    if tracks_df.empty:
+        print("No tracks to analyze.")
+        return tracks_df, platform
+    
     # Top artists
     print("🎤 TOP 10 ARTISTS:")
     artist_counts = tracks_df['artist_name'].value_counts().head(10)
@@ -157,13 +169,10 @@ def analyze_apple_music_specific(tracks_df):
     
     # Genre analysis
     if 'genre_names' in tracks_df.columns:
-        all_genres = []
-        for genres in tracks_df['genre_names'].dropna():
-            if genres:
-                all_genres.extend(genres)
+        genre_counter = Counter(genre for genres in tracks_df['genre_names'].dropna() for genre in genres)
         
-        if all_genres:
-            genre_counts = Counter(all_genres).most_common(10)
+        if genre_counter:
+            genre_counts = genre_counter.most_common(10)
             print("🎵 TOP GENRES:")
             for i, (genre, count) in enumerate(genre_counts, 1):
                 print(f"{i:2d}. {genre}: {count} tracks")
@@ -313,13 +322,10 @@ def create_apple_music_visualizations(tracks_df, output_dir):
     
     # Genre distribution
     if 'genre_names' in tracks_df.columns:
-        all_genres = []
-        for genres in tracks_df['genre_names'].dropna():
-            if genres:
-                all_genres.extend(genres)
+        genre_counter = Counter(genre for genres in tracks_df['genre_names'].dropna() for genre in genres)
         
-        if all_genres:
-            genre_counts = Counter(all_genres).most_common(15)
+        if genre_counter:
+            genre_counts = genre_counter.most_common(15)
             genres, counts = zip(*genre_counts)
             
             plt.figure(figsize=(12, 8))
@@ -341,7 +347,9 @@ def main():
         print("❌ No playlist_data directory found. Run the indexer script first.")
         return
     
-    json_files = list(data_dir.glob('*.json'))
+    # Skip dotfiles such as the indexers' bookkeeping files
+    json_files = [f for f in list(data_dir.glob('*.json')) + list(data_dir.glob('*.json.gz'))
+                  if not f.name.startswith('.')]
     
     if not json_files:
         print("❌ No JSON files found in playlist_data directory.")
@@ -3,33 +3,82 @@
 Apple Music Playlist Indexer
 
 This script indexes an Apple Music playlist, downloads artwork images,
-and saves metadata as JSON using pandas DataFrame.
+and saves metadata as JSON.
 """
 
-import requests
-import pandas as pd
-import json
+import httpx
+import orjson
+import gzip
+import hashlib
 import os
-import time
-from urllib.parse import urlparse, parse_qs
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
 from pathlib import Path
+from datetime import datetime
 import logging
 
+from http_client import create_client, send_with_retries
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Maximum page size of the playlist tracks relationship endpoint
+TRACKS_PAGE_LIMIT = 100
+
+def _extract_track(track_data, track_index):
+    """
+    Extract the metadata we keep from an Apple Music song resource.
+    
+    Kept at module level with a single dict literal, since it runs once per
+    track and the response schema is fixed.
+    
+    Args:
+        track_data (dict): Track data from API
+        track_index (int): Track index in playlist
+        
+    Returns:
+        dict: Processed track metadata
+    """
+    attrs = track_data.get('attributes') or {}
+    previews = attrs.get('previews')
+    artwork = attrs.get('artwork') or {}
+    
+    return {
+        'index': track_index,
+        'id': track_data.get('id'),
+        'type': track_data.get('type'),
+        'name': attrs.get('name'),
+        'artist_name': attrs.get('artistName'),
+        'album_name': attrs.get('albumName'),
+        'duration_ms': attrs.get('durationInMillis'),
+        'release_date': attrs.get('releaseDate'),
+        'genre_names': attrs.get('genreNames', []),
+        'track_number': attrs.get('trackNumber'),
+        'disc_number': attrs.get('discNumber'),
+        'isrc': attrs.get('isrc'),
+        'content_rating': attrs.get('contentRating'),
+        'preview_url': previews[0].get('url') if previews else None,
+        'artwork_url': artwork.get('url'),
+        'artwork_local_path': None
+    }
+
 class AppleMusicPlaylistIndexer:
-    def __init__(self, developer_token, storefront='us'):
+    def __init__(self, developer_token, storefront='us', max_workers=16, concurrent_playlists=1):
         """
         Initialize the Apple Music API client.
         
         Args:
             developer_token (str): Apple Music API developer token
             storefront (str): Apple Music storefront (default: 'us')
+            max_workers (int): Number of concurrent artwork downloads (default: 16)
+            concurrent_playlists (int): How many index_playlist calls will run at
+                                        once on this indexer (default: 1)
         """
         self.developer_token = developer_token
         self.storefront = storefront
+        self.max_workers = max_workers
         self.base_url = 'https://api.music.apple.com/v1'
         self.headers = {
             'Authorization': f'Bearer {developer_token}',
@@ -37,11 +86,32 @@ class AppleMusicPlaylistIndexer:
             'Content-Type': 'application/json'
         }
         
+        # Shared by the catalog API and the artwork CDN. Each running playlist
+        # has at most max_workers requests in flight (page fetches, then artwork).
+        self.client = create_client(pool_size=max_workers * concurrent_playlists)
+        
         # Create directories for storing images and data
         self.images_dir = Path('playlist_images')
         self.data_dir = Path('playlist_data')
         self.images_dir.mkdir(exist_ok=True)
         self.data_dir.mkdir(exist_ok=True)
+        
+        # Resolved artwork URL -> local path, so shared album art is fetched once
+        self._artwork_cache = {}
+    
+    def close(self):
+        """Close the underlying HTTP client."""
+        self.client.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def _request(self, method, url, stream=False, **kwargs):
+        """Send a request through the client, retrying transient failures."""
+        return send_with_retries(self.client, method, url, stream=stream, **kwargs)
     
     def extract_playlist_id(self, playlist_url):
         """
@@ -71,52 +141,153 @@ class AppleMusicPlaylistIndexer:
         url = f"{self.base_url}/catalog/{self.storefront}/playlists/{playlist_id}"
         params = {
             'include': 'tracks',
-            'limit': 300  # Maximum tracks per request
+            'limit': 300  # Tracks to embed; the API may return a smaller first page
         }
         
         try:
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self._request('GET', url, params=params, headers=self.headers)
             response.raise_for_status()
             return response.json()
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Error fetching playlist details: {e}")
             return None
     
-    def download_artwork(self, artwork_url, filename):
+    def get_tracks_page(self, page_path):
         """
-        Download artwork image from URL.
+        Get one page of a playlist's tracks relationship.
         
         Args:
-            artwork_url (str): Artwork URL
-            filename (str): Local filename to save
+            page_path (str): API path of the page, e.g. a relationship's 'next' cursor
             
         Returns:
-            str: Local file path or None if failed
+            dict: Page data or None if failed
         """
-        if not artwork_url:
+        api_root = urlparse(self.base_url)
+        url = f"{api_root.scheme}://{api_root.netloc}{page_path}"
+        
+        try:
+            response = self._request('GET', url, headers=self.headers)
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError as e:
+            logger.error(f"Error fetching tracks page {page_path}: {e}")
             return None
+    
+    def get_playlist_tracks(self, playlist_info):
+        """
+        Get all tracks of a playlist, following the tracks relationship's pagination.
+        
+        When the API reports the total track count, the remaining pages are
+        fetched concurrently; otherwise the 'next' cursors are followed in order.
+        
+        Args:
+            playlist_info (dict): Playlist resource from get_playlist_details
             
-        try:
-            # Replace size parameters with high resolution
-            if '{w}x{h}' in artwork_url:
-                artwork_url = artwork_url.replace('{w}x{h}', '1200x1200')
+        Returns:
+            list: List of track data
+        """
+        tracks = (playlist_info.get('relationships', {}).get('tracks')
+                  or playlist_info.get('attributes', {}).get('tracks')
+                  or {})
+        all_tracks = list(tracks.get('data', []))
+        next_path = tracks.get('next')
+        total = tracks.get('meta', {}).get('total')
+        
+        if next_path and total and all_tracks:
+            # All offsets are known up front, so fetch the remaining pages in
+            # parallel, asking for an explicit page size so the offsets line up
+            page_path = next_path.split('?')[0]
+            page_size = min(len(all_tracks), TRACKS_PAGE_LIMIT)
+            page_paths = [f"{page_path}?offset={offset}&limit={page_size}" for offset in range(len(all_tracks), total, page_size)]
             
-            response = requests.get(artwork_url, timeout=30)
-            response.raise_for_status()
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for page in executor.map(self.get_tracks_page, page_paths):
+                    if not page:
+                        break
+                    all_tracks.extend(page.get('data', []))
+            
+            if len(all_tracks) != total:
+                logger.warning(f"Playlist is incomplete: fetched {len(all_tracks)} of {total} tracks")
             
-            file_path = self.images_dir / filename
-            with open(file_path, 'wb') as f:
-                f.write(response.content)
+            return all_tracks
+        
+        while next_path:
+            page = self.get_tracks_page(next_path)
+            if not page:
+                logger.warning(f"Playlist is incomplete: stopped after {len(all_tracks)} tracks")
+                break
             
-            logger.info(f"Downloaded artwork: {filename}")
+            all_tracks.extend(page.get('data', []))
+            next_path = page.get('next')
+            logger.info(f"Retrieved {len(all_tracks)} tracks so far...")
+        
+        return all_tracks
+    
+    def download_artwork(self, artwork_url):
+        """
+        Download artwork image from URL unless it is already on disk.
+        
+        Images are stored under a name derived from a hash of the resolved URL,
+        so reruns and overlapping playlists reuse earlier downloads.
+        
+        Args:
+            artwork_url (str): Artwork URL
+            
+        Returns:
+            str: Local file path or None if failed
+        """
+        if not artwork_url:
+            return None
+        
+        # Replace size parameters with high resolution
+        if '{w}x{h}' in artwork_url:
+            artwork_url = artwork_url.replace('{w}x{h}', '1200x1200')
+        
+        cached_path = self._artwork_cache.get(artwork_url)
+        if cached_path:
+            logger.info(f"Artwork already downloaded, reusing: {cached_path}")
+            return cached_path
+        
+        filename = f"{hashlib.blake2b(artwork_url.encode(), digest_size=12).hexdigest()}.jpg"
+        file_path = self.images_dir / filename
+        
+        if file_path.exists() and file_path.stat().st_size > 0:
+            logger.debug(f"Artwork already on disk, skipping download: {filename}")
+            self._artwork_cache[artwork_url] = str(file_path)
             return str(file_path)
-        except requests.exceptions.RequestException as e:
+        
+        # Download to a unique temporary file so an interrupted transfer never
+        # leaves a truncated image that later runs would treat as cached, and
+        # concurrent runs fetching the same image don't write over each other
+        part_path = file_path.with_name(f"{filename}.{uuid.uuid4().hex}.part")
+        
+        try:
+            with open(part_path, 'wb') as f:
+                # The artwork CDN doesn't need (or get) the developer token.
+                # Stream the body straight to disk instead of buffering it.
+                response = self._request('GET', artwork_url, stream=True)
+                try:
+                    response.raise_for_status()
+                    for chunk in response.iter_bytes(chunk_size=64 * 1024):
+                        f.write(chunk)
+                finally:
+                    response.close()
+            
+            os.replace(part_path, file_path)
+        except httpx.HTTPError as e:
             logger.error(f"Error downloading artwork {filename}: {e}")
+            part_path.unlink(missing_ok=True)
             return None
+        
+        logger.info(f"Downloaded artwork: {filename}")
+        self._artwork_cache[artwork_url] = str(file_path)
+        return str(file_path)
     
     def process_track(self, track_data, track_index):
         """
-        Process individual track data and download artwork.
+        Process individual track data into metadata.
+        
+        Artwork is downloaded separately; see process_tracks.
         
         Args:
             track_data (dict): Track data from API
@@ -125,44 +296,50 @@ class AppleMusicPlaylistIndexer:
         Returns:
             dict: Processed track metadata
         """
-        track_info = {
-            'index': track_index,
-            'id': track_data.get('id'),
-            'type': track_data.get('type'),
-            'name': track_data.get('attributes', {}).get('name'),
-            'artist_name': track_data.get('attributes', {}).get('artistName'),
-            'album_name': track_data.get('attributes', {}).get('albumName'),
-            'duration_ms': track_data.get('attributes', {}).get('durationInMillis'),
-            'release_date': track_data.get('attributes', {}).get('releaseDate'),
-            'genre_names': track_data.get('attributes', {}).get('genreNames', []),
-            'track_number': track_data.get('attributes', {}).get('trackNumber'),
-            'disc_number': track_data.get('attributes', {}).get('discNumber'),
-            'isrc': track_data.get('attributes', {}).get('isrc'),
-            'content_rating': track_data.get('attributes', {}).get('contentRating'),
-            'preview_url': track_data.get('attributes', {}).get('previews', [{}])[0].get('url'),
-            'artwork_url': None,
-            'artwork_local_path': None
-        }
+        return _extract_track(track_data, track_index)
+    
+    def process_tracks(self, tracks_data):
+        """
+        Process all tracks and download their artwork concurrently.
         
-        # Handle artwork
-        artwork = track_data.get('attributes', {}).get('artwork')
-        if artwork:
-            artwork_url = artwork.get('url')
-            if artwork_url:
-                track_info['artwork_url'] = artwork_url
-                
-                # Create filename for artwork
-                safe_name = f"{track_index:03d}_{track_info['artist_name']}_{track_info['name']}"
-                safe_name = "".join(c for c in safe_name if c.isalnum() or c in (' ', '-', '_')).rstrip()
-                safe_name = safe_name.replace(' ', '_')[:100]  # Limit filename length
-                artwork_filename = f"{safe_name}.jpg"
+        Each artwork download is submitted to the thread pool as soon as its
+        track's metadata is extracted, so extraction overlaps the network I/O.
+        Tracks sharing the same artwork URL (e.g. from the same album) are
+        downloaded once and point at the same local file.
+        
+        Args:
+            tracks_data (list): Track data from API
+            
+        Returns:
+            list: Processed track metadata, with 'artwork_local_path' set
+                  for each track whose download succeeded
+        """
+        processed_tracks = []
+        tracks_by_url = {}
+        futures = {}
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for index, track in enumerate(tracks_data, 1):
+                track_info = _extract_track(track, index)
+                processed_tracks.append(track_info)
                 
-                # Download artwork
-                local_path = self.download_artwork(artwork_url, artwork_filename)
+                artwork_url = track_info['artwork_url']
+                if artwork_url:
+                    tracks = tracks_by_url.get(artwork_url)
+                    if tracks is None:
+                        tracks = tracks_by_url[artwork_url] = []
+                        futures[executor.submit(self.download_artwork, artwork_url)] = tracks
+                    tracks.append(track_info)
+            
+            logger.info(f"Processed {len(processed_tracks)} tracks, downloading {len(futures)} unique artwork images...")
+            
+            for future in as_completed(futures):
+                local_path = future.result()
                 if local_path:
-                    track_info['artwork_local_path'] = local_path
+                    for track_info in futures[future]:
+                        track_info['artwork_local_path'] = local_path
         
-        return track_info
+        return processed_tracks
     
     def index_playlist(self, playlist_url):
         """
@@ -172,7 +349,7 @@ class AppleMusicPlaylistIndexer:
             playlist_url (str): Apple Music playlist URL
             
         Returns:
-            str: Path to saved JSON file
+            str: Path to saved gzipped JSON file
         """
         logger.info(f"Starting to index playlist: {playlist_url}")
         
@@ -191,57 +368,48 @@ class AppleMusicPlaylistIndexer:
             return None
         
         # Extract playlist metadata
-        playlist_info = playlist_data.get('data', [{}])[0]
-        playlist_attributes = playlist_info.get('attributes', {})
+        resources = playlist_data.get('data')
+        playlist_info = resources[0] if resources else {}
+        playlist_attributes = playlist_info.get('attributes') or {}
+        
+        # Get all tracks
+        tracks_data = self.get_playlist_tracks(playlist_info)
         
         playlist_metadata = {
             'id': playlist_info.get('id'),
             'name': playlist_attributes.get('name'),
-            'description': playlist_attributes.get('description', {}).get('standard'),
+            'description': (playlist_attributes.get('description') or {}).get('standard'),
             'curator_name': playlist_attributes.get('curatorName'),
             'last_modified_date': playlist_attributes.get('lastModifiedDate'),
-            'track_count': len(playlist_attributes.get('tracks', {}).get('data', [])),
+            'track_count': len(tracks_data),
             'url': playlist_url
         }
         
         logger.info(f"Playlist: {playlist_metadata['name']} ({playlist_metadata['track_count']} tracks)")
         
-        # Process tracks
-        tracks_data = playlist_attributes.get('tracks', {}).get('data', [])
-        processed_tracks = []
-        
-        for index, track in enumerate(tracks_data, 1):
-            logger.info(f"Processing track {index}/{len(tracks_data)}: {track.get('attributes', {}).get('name')}")
-            
-            track_info = self.process_track(track, index)
-            processed_tracks.append(track_info)
-            
-            # Add small delay to be respectful to the API
-            time.sleep(0.1)
-        
-        # Create DataFrame
-        df = pd.DataFrame(processed_tracks)
+        # Process tracks, downloading artwork from the CDN in parallel
+        processed_tracks = self.process_tracks(tracks_data)
         
         # Prepare final data structure
         final_data = {
             'playlist_metadata': playlist_metadata,
-            'tracks': df.to_dict('records'),
+            'tracks': processed_tracks,
             'summary': {
                 'total_tracks': len(processed_tracks),
-                'total_duration_ms': df['duration_ms'].sum(),
-                'unique_artists': df['artist_name'].nunique(),
-                'unique_albums': df['album_name'].nunique(),
-                'genres': list(set([genre for genres in df['genre_names'] for genre in genres if genres])),
-                'indexed_at': pd.Timestamp.now().isoformat()
+                'total_duration_ms': sum(t['duration_ms'] or 0 for t in processed_tracks),
+                'unique_artists': len({t['artist_name'] for t in processed_tracks if t['artist_name'] is not None}),
+                'unique_albums': len({t['album_name'] for t in processed_tracks if t['album_name'] is not None}),
+                'genres': sorted({g for t in processed_tracks for g in (t['genre_names'] or ())}),
+                'indexed_at': datetime.now().isoformat()
             }
         }
         
-        # Save to JSON
-        json_filename = f"playlist_{playlist_id}_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.json"
+        # Save to gzipped JSON; the payload is repetitive text and level 1 is cheap
+        json_filename = f"playlist_{playlist_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json.gz"
         json_path = self.data_dir / json_filename
         
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(final_data, f, indent=2, ensure_ascii=False)
+        with gzip.open(json_path, 'wb', compresslevel=1) as f:
+            f.write(orjson.dumps(final_data, option=orjson.OPT_INDENT_2))
         
         logger.info(f"Saved playlist data to: {json_path}")
         logger.info(f"Downloaded {len([t for t in processed_tracks if t['artwork_local_path']])} artwork images")
@@ -261,11 +429,9 @@ def main():
         print("You can get one from: https://developer.apple.com/documentation/applemusicapi/generating_developer_tokens")
         return
     
-    # Create indexer instance
-    indexer = AppleMusicPlaylistIndexer(DEVELOPER_TOKEN)
-    
-    # Index the playlist
-    result_path = indexer.index_playlist(PLAYLIST_URL)
+    # Create indexer instance and index the playlist
+    with AppleMusicPlaylistIndexer(DEVELOPER_TOKEN) as indexer:
+        result_path = indexer.index_playlist(PLAYLIST_URL)
     
     if result_path:
         print(f"\n✅ Successfully indexed playlist!")
@@ -6,7 +6,11 @@ This script demonstrates how to use both the Spotify and Apple Music playlist in
 and analyze the results.
 """
 
-import json
+import gzip
+import mmap
+import os
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from spotify_playlist_indexer import SpotifyPlaylistIndexer
 from apple_music_playlist_indexer import AppleMusicPlaylistIndexer
@@ -33,12 +37,14 @@ def index_spotify_playlist():
         return
     
     try:
-        indexer = SpotifyPlaylistIndexer(CLIENT_ID, CLIENT_SECRET)
+        # Playlists are independent and network-bound, so index them concurrently
+        print(f"\n🎵 Indexing {len(playlists)} playlists...")
+        with SpotifyPlaylistIndexer(CLIENT_ID, CLIENT_SECRET, concurrent_playlists=len(playlists)) as indexer:
+            with ThreadPoolExecutor(max_workers=len(playlists)) as executor:
+                results = list(executor.map(indexer.index_playlist, playlists))
         
-        for playlist_url in playlists:
-            print(f"\n🎵 Indexing: {playlist_url}")
-            result = indexer.index_playlist(playlist_url)
-            
+        for playlist_url, result in zip(playlists, results):
+            print(f"\n🎵 {playlist_url}")
             if result:
                 print(f"✅ Success! Data saved to: {result}")
             else:
@@ -67,12 +73,14 @@ def index_apple_music_playlist():
         return
     
     try:
-        indexer = AppleMusicPlaylistIndexer(DEVELOPER_TOKEN)
+        # Playlists are independent and network-bound, so index them concurrently
+        print(f"\n🍎 Indexing {len(playlists)} playlists...")
+        with AppleMusicPlaylistIndexer(DEVELOPER_TOKEN, concurrent_playlists=len(playlists)) as indexer:
+            with ThreadPoolExecutor(max_workers=len(playlists)) as executor:
+                results = list(executor.map(indexer.index_playlist, playlists))
         
-        for playlist_url in playlists:
-            print(f"\n🍎 Indexing: {playlist_url}")
-            result = indexer.index_playlist(playlist_url)
-            
+        for playlist_url, result in zip(playlists, results):
+            print(f"\n🍎 {playlist_url}")
             if result:
                 print(f"✅ Success! Data saved to: {result}")
             else:
@@ -93,8 +101,11 @@ def compare_platforms():
         print("❌ No playlist data found. Run the indexers first!")
         return
     
-    spotify_files = list(data_dir.glob('spotify_playlist_*.json'))
-    apple_files = list(data_dir.glob('playlist_pl.*.json'))
+    # One directory pass, classified by the filename prefix each indexer writes
+    with os.scandir(data_dir) as it:
+        json_names = [entry.name for entry in it if entry.is_file() and entry.name.endswith(('.json', '.json.gz'))]
+    spotify_files = [data_dir / name for name in json_names if name.startswith('spotify_playlist_')]
+    apple_files = [data_dir / name for name in json_names if name.startswith('playlist_pl.')]
     
     print(f"📊 Found {len(spotify_files)} Spotify playlists")
     print(f"📊 Found {len(apple_files)} Apple Music playlists")
@@ -113,33 +124,55 @@ def compare_platforms():
     print("API Cost                 | Free    | $99/year   ")
     
     # Show sample data structures
-    if spotify_files:
+    spotify_data = load_playlist_json(spotify_files[0]) if spotify_files else None
+    if spotify_data:
         print(f"\n🎵 SPOTIFY SAMPLE DATA:")
-        with open(spotify_files[0], 'r') as f:
-            spotify_data = json.load(f)
-            playlist_name = spotify_data['playlist_metadata']['name']
-            track_count = spotify_data['summary']['total_tracks']
-            print(f"   Playlist: {playlist_name}")
-            print(f"   Tracks: {track_count}")
-            
-            # Show first track structure
-            if spotify_data['tracks']:
-                track = spotify_data['tracks'][0]
-                print(f"   Sample track keys: {list(track.keys())[:8]}...")
-    
-    if apple_files:
+        playlist_name = spotify_data['playlist_metadata']['name']
+        track_count = spotify_data['summary']['total_tracks']
+        print(f"   Playlist: {playlist_name}")
+        print(f"   Tracks: {track_count}")
+        
+        # Show first track structure
+        if spotify_data.get('tracks'):
+            track = spotify_data['tracks'][0]
+            print(f"   Sample track keys: {list(track.keys())[:8]}...")
+        elif 'tracks_file' in spotify_data:
+            print(f"   Tracks file: {spotify_data['tracks_file']}")
+    
+    apple_data = load_playlist_json(apple_files[0]) if apple_files else None
+    if apple_data:
         print(f"\n🍎 APPLE MUSIC SAMPLE DATA:")
-        with open(apple_files[0], 'r') as f:
-            apple_data = json.load(f)
-            playlist_name = apple_data['playlist_metadata']['name']
-            track_count = apple_data['summary']['total_tracks']
-            print(f"   Playlist: {playlist_name}")
-            print(f"   Tracks: {track_count}")
-            
-            # Show first track structure
-            if apple_data['tracks']:
-                track = apple_data['tracks'][0]
-                print(f"   Sample track keys: {list(track.keys())[:8]}...")
+        playlist_name = apple_data['playlist_metadata']['name']
+        track_count = apple_data['summary']['total_tracks']
+        print(f"   Playlist: {playlist_name}")
+        print(f"   Tracks: {track_count}")
+        
+        # Show first track structure
+        if apple_data['tracks']:
+            track = apple_data['tracks'][0]
+            print(f"   Sample track keys: {list(track.keys())[:8]}...")
+
+def load_playlist_json(json_file):
+    """
+    Parse a playlist JSON file, gzipped or plain.
+    
+    Plain files are parsed straight from a read-only memory map. Empty files,
+    e.g. from an interrupted run, can't be mapped and are skipped.
+    
+    Returns:
+        dict: Playlist data, or None for an empty file
+    """
+    if str(json_file).endswith('.gz'):
+        with gzip.open(json_file, 'rb') as f:
+            return orjson.loads(f.read())
+    
+    with open(json_file, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            print(f"⚠️  Skipping empty file: {json_file}")
+            return None
+        
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            return orjson.loads(view)
 
 def quick_analysis():
     """Quick analysis of indexed playlists."""
@@ -148,14 +181,16 @@ def quick_analysis():
     print("=" * 50)
     
     data_dir = Path('playlist_data')
-    json_files = list(data_dir.glob('*.json'))
+    # Skip dotfiles such as the indexers' bookkeeping files
+    json_files = [f for f in list(data_dir.glob('*.json')) + list(data_dir.glob('*.json.gz'))
+                  if not f.name.startswith('.')]
     
     for json_file in json_files:
         print(f"\n📂 Analyzing: {json_file.name}")
         
-        with open(json_file, 'r') as f:
-            data = json.load(f)
-        
+        data = load_playlist_json(json_file)
+        if data is None:
+            continue
         metadata = data['playlist_metadata']
         summary = data['summary']
         
@@ -166,7 +201,7 @@ def quick_analysis():
         print(f"   💿 Albums: {summary.get('unique_albums', 0)}")
         
         # Platform-specific info
-        if 'average_popularity' in summary:
+        if summary.get('average_popularity') is not None:  # None for an empty playlist
             print(f"   ⭐ Avg Popularity: {summary['average_popularity']:.1f}")
         if 'genres' in summary:
             print(f"   🎵 Genres: {len(summary['genres'])}")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+HTTP helpers shared by the playlist indexers.
+
+Both indexers talk to a JSON API and an artwork CDN through one pooled
+HTTP/2 httpx client and retry the same transient failures.
+"""
+
+import time
+import logging
+
+import httpx
+
+logger = logging.getLogger(__name__)
+logging.getLogger('httpx').setLevel(logging.WARNING)  # httpx logs every request at INFO
+
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 5
+# Longest Retry-After (seconds) worth blocking a worker thread for
+MAX_RETRY_AFTER = 60
+
+
+def create_client(pool_size, timeout=30.0):
+    """
+    Create an HTTP/2 client whose pool holds one connection per worker thread.
+
+    Concurrent requests to an HTTP/2 host share a single multiplexed
+    connection; sizing the pool to the thread count means HTTP/1.1 fallbacks
+    never make threads queue for a connection.
+
+    Args:
+        pool_size (int): Number of threads that may use the client at once
+        timeout (float): Request timeout in seconds
+
+    Returns:
+        httpx.Client: The client
+    """
+    return httpx.Client(
+        transport=httpx.HTTPTransport(
+            http2=True,
+            retries=3,  # Connection errors only; status retries are in send_with_retries
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        ),
+        timeout=timeout
+    )
+
+
+def send_with_retries(client, method, url, stream=False, before_attempt=None, **kwargs):
+    """
+    Send a request, retrying on rate limiting and transient server errors.
+
+    Honors the Retry-After header when present, otherwise backs off
+    exponentially. A response asking to wait longer than MAX_RETRY_AFTER
+    is returned as is. The caller must close streamed responses.
+
+    Args:
+        client (httpx.Client): Client to send the request with
+        method (str): HTTP method
+        url (str): Request URL
+        stream (bool): Return before reading the response body
+        before_attempt (callable): Called before every attempt, e.g. to rate limit
+        **kwargs: Passed to httpx.Client.build_request
+
+    Returns:
+        httpx.Response: The final response
+    """
+    request = client.build_request(method, url, **kwargs)
+    for attempt in range(MAX_RETRIES + 1):
+        if before_attempt:
+            before_attempt()
+
+        response = client.send(request, stream=stream)
+        if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+            return response
+
+        retry_after = response.headers.get('Retry-After', '')
+        delay = int(retry_after) if retry_after.isdigit() else 0.3 * 2 ** attempt
+        if delay > MAX_RETRY_AFTER:
+            logger.warning(f"Got HTTP {response.status_code} from {url} with Retry-After {delay}s, giving up")
+            return response
+
+        response.close()
+        logger.warning(f"Got HTTP {response.status_code} from {url}, retrying in {delay}s")
+        time.sleep(delay)
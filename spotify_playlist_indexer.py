@@ -3,46 +3,308 @@
 Spotify Playlist Indexer
 
 This script indexes a Spotify playlist, downloads artwork images,
-and saves metadata as JSON using pandas DataFrame.
+and saves metadata as JSON.
 """
 
-import requests
-import pandas as pd
-import json
+import httpx
+import orjson
 import os
+import sys
+import uuid
 import time
 import base64
-from urllib.parse import urlparse, parse_qs
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from datetime import datetime
 import logging
 import re
 
+from http_client import create_client, send_with_retries
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Maximum page size of the playlist tracks endpoint
+TRACKS_PAGE_SIZE = 100
+
+# Server-side response filters ("fields" parameter) limited to what index_playlist
+# and process_track read; full track objects carry ~180 available_markets each
+PLAYLIST_FIELDS = (
+    'id,name,description,owner(id,display_name),public,collaborative,'
+    'followers.total,external_urls.spotify,snapshot_id'
+)
+TRACK_ITEM_FIELDS = (
+    'added_at,added_by.id,'
+    'track(type,id,name,duration_ms,explicit,popularity,track_number,disc_number,'
+    'preview_url,external_urls.spotify,artists(name),'
+    'album(id,name,release_date,album_type,total_tracks,images(url)))'
+)
+TRACKS_PAGE_FIELDS = f'total,next,items({TRACK_ITEM_FIELDS})'
+# Playlist details embed the first page of tracks, which saves a round trip
+PLAYLIST_FIELDS += f',tracks({TRACKS_PAGE_FIELDS})'
+
+# Concurrent requests used to fetch the remaining pages of a playlist
+PAGE_FETCH_WORKERS = 4
+
+# Artwork filename sanitization: drop special chars, collapse spaces/hyphens
+_SANITIZE_BAD = re.compile(r'[^\w\s-]')
+_SANITIZE_WS = re.compile(r'[-\s]+')
+# Same as _SANITIZE_BAD for ASCII-only names, but done by str.translate
+_SANITIZE_BAD_ASCII = {c: None for c in range(128) if _SANITIZE_BAD.match(chr(c))}
+
+
+def _intern(value):
+    """Intern a string value so repeats (same artist, album, ...) share one object."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _extract_track(track_item, track_index):
+    """
+    Extract the metadata we keep from a Spotify playlist track item.
+    
+    Strings that repeat across tracks (artists, albums, ...) are interned.
+    
+    Args:
+        track_item (dict): Track item from API (includes track + added info)
+        track_index (int): Track index in playlist
+        
+    Returns:
+        dict: Processed track metadata, or None for local files and episodes
+    """
+    track_data = track_item.get('track')
+    
+    # Handle local tracks or None tracks
+    if not track_data or track_data.get('type') != 'track':
+        return None
+    
+    artist_names = [_intern(artist.get('name', '')) for artist in track_data.get('artists', [])]
+    album = track_data.get('album') or {}
+    album_images = album.get('images')  # Largest image first
+    
+    return {
+        'index': track_index,
+        'id': track_data.get('id'),
+        'name': track_data.get('name'),
+        'artist_name': artist_names[0] if artist_names else 'Unknown Artist',
+        'all_artists': artist_names,
+        'album_name': _intern(album.get('name', 'Unknown Album')),
+        'album_id': _intern(album.get('id')),
+        'duration_ms': track_data.get('duration_ms'),
+        'explicit': track_data.get('explicit', False),
+        'popularity': track_data.get('popularity', 0),
+        'track_number': track_data.get('track_number'),
+        'disc_number': track_data.get('disc_number'),
+        # 'YYYY', 'YYYY-MM' or 'YYYY-MM-DD', so the precision is implied
+        'release_date': _intern(album.get('release_date')),
+        'album_type': _intern(album.get('album_type')),
+        'total_tracks': album.get('total_tracks'),
+        'preview_url': track_data.get('preview_url'),
+        'spotify_url': (track_data.get('external_urls') or {}).get('spotify'),
+        'added_at': track_item.get('added_at'),
+        'added_by': _intern((track_item.get('added_by') or {}).get('id')),
+        'artwork_url': _intern(album_images[0].get('url')) if album_images else None,
+        'artwork_local_path': None
+    }
+
+
+def _track_columns(processed_tracks):
+    """
+    Transpose processed tracks into one list per field, in a single pass.
+    
+    Every track dict comes from the same literal in _extract_track, so the
+    values line up by position and zip() transposes them in C.
+    
+    Args:
+        processed_tracks (list): Processed track metadata dicts
+        
+    Returns:
+        dict: Mapping of field name to column values
+    """
+    if not processed_tracks:
+        return {}
+    
+    columns = zip(*(track.values() for track in processed_tracks))
+    return {key: list(column) for key, column in zip(processed_tracks[0], columns)}
+
+
+def _json(response):
+    """
+    Parse a response body with orjson, which is much faster than response.json().
+    
+    Decode errors are raised as httpx.DecodingError, so callers' httpx.HTTPError
+    handlers catch them like any other failed request.
+    """
+    try:
+        return orjson.loads(response.content)
+    except orjson.JSONDecodeError as e:
+        raise httpx.DecodingError(f"Invalid JSON in response: {e}", request=response.request) from e
+
+
+def _load_json_sidecar(path):
+    """
+    Load a small JSON bookkeeping file.
+    
+    Args:
+        path (Path): File path
+        
+    Returns:
+        dict: File contents, or an empty dict if missing or unreadable
+    """
+    try:
+        return orjson.loads(path.read_bytes())
+    except FileNotFoundError:
+        return {}
+    except orjson.JSONDecodeError as e:
+        logger.warning(f"Ignoring unreadable {path}: {e}")
+        return {}
+
+
+def _write_json_atomic(path, data):
+    """
+    Write a small JSON bookkeeping file atomically.
+    
+    Args:
+        path (Path): File path
+        data (dict): Data to write
+    """
+    part_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.part")
+    part_path.write_bytes(orjson.dumps(data))
+    os.replace(part_path, path)
+
+
+class _RateLimiter:
+    """Thread-safe token bucket that spaces out Spotify Web API calls."""
+    
+    def __init__(self, rate=10.0, capacity=10):
+        """
+        Args:
+            rate (float): Tokens added per second (sustained requests/second)
+            capacity (int): Maximum burst size
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a token is available, then consume it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+                
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                
+                wait = (1 - self.tokens) / self.rate
+            
+            time.sleep(wait)
+
+
 class SpotifyPlaylistIndexer:
-    def __init__(self, client_id, client_secret):
+    def __init__(self, client_id, client_secret, max_workers=16, tracks_format='json', concurrent_playlists=1):
         """
         Initialize the Spotify API client.
         
         Args:
             client_id (str): Spotify API client ID
             client_secret (str): Spotify API client secret
+            max_workers (int): Number of concurrent artwork downloads (default: 16)
+            tracks_format (str): 'json' to embed tracks in the playlist JSON (default),
+                                 or 'parquet' to write them to a separate Parquet
+                                 file next to it (requires pandas and pyarrow)
+            concurrent_playlists (int): How many index_playlist calls will run at
+                                        once on this indexer (default: 1)
         """
+        if tracks_format not in ('json', 'parquet'):
+            raise ValueError(f"Unsupported tracks_format: {tracks_format!r}")
+        
         self.client_id = client_id
         self.client_secret = client_secret
+        self.max_workers = max_workers
+        self.tracks_format = tracks_format
         self.base_url = 'https://api.spotify.com/v1'
         self.access_token = None
         
+        self.headers = {}  # Set by get_access_token
+        
+        # Shared by the Web API and the i.scdn.co artwork CDN. Each running
+        # playlist uses max_workers artwork threads plus the page fetchers.
+        # Responses are Brotli-compressed when httpx[brotli] is installed.
+        self.client = create_client(pool_size=(max_workers + PAGE_FETCH_WORKERS) * concurrent_playlists)
+        
+        # Keep API calls around Spotify's ~10 requests/second sustained limit
+        self.limiter = _RateLimiter(rate=10.0, capacity=10)
+        
         # Create directories for storing images and data
         self.images_dir = Path('playlist_images')
         self.data_dir = Path('playlist_data')
         self.images_dir.mkdir(exist_ok=True)
         self.data_dir.mkdir(exist_ok=True)
         
-        # Get access token
-        self.get_access_token()
+        # Source URL of each downloaded image, so changed artwork is refetched
+        self.artwork_meta_path = self.images_dir / '.artwork_meta.json'
+        self.artwork_meta = self.load_artwork_meta()
+        
+        # Last indexed snapshot of each playlist, so unchanged playlists are skipped.
+        # Not named *.json, so readers globbing playlist_data/ don't pick it up.
+        self.snapshot_cache_path = self.data_dir / '.snapshot_cache'
+        self._snapshot_lock = threading.Lock()
+        
+        # Get access token, not leaking the client if authentication fails
+        try:
+            self.get_access_token()
+        except Exception:
+            self.client.close()
+            raise
+    
+    def close(self):
+        """Close the underlying HTTP client."""
+        self.client.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def _request(self, method, url, stream=False, limiter=None, **kwargs):
+        """
+        Send a request through the client, retrying transient failures.
+        
+        Args:
+            method (str): HTTP method
+            url (str): Request URL
+            stream (bool): Return before reading the response body
+            limiter (_RateLimiter): Rate limiter to acquire before every attempt
+            **kwargs: Passed to httpx.Client.build_request
+            
+        Returns:
+            httpx.Response: The final response
+        """
+        before_attempt = limiter.acquire if limiter else None
+        return send_with_retries(self.client, method, url, stream=stream, before_attempt=before_attempt, **kwargs)
+    
+    def _api_request(self, method, url, **kwargs):
+        """
+        Make a rate-limited Spotify Web API request.
+        
+        Args:
+            method (str): HTTP method
+            url (str): Request URL
+            **kwargs: Passed to httpx.Client.build_request; the access token
+                      headers are used unless headers are given
+            
+        Returns:
+            httpx.Response: The final response
+        """
+        kwargs.setdefault('headers', self.headers)
+        return self._request(method, url, limiter=self.limiter, **kwargs)
     
     def get_access_token(self):
         """
@@ -65,24 +327,21 @@ class SpotifyPlaylistIndexer:
         }
         
         try:
-            response = requests.post(auth_url, headers=headers, data=data)
+            response = self._api_request('POST', auth_url, headers=headers, data=data)
             response.raise_for_status()
             
-            token_data = response.json()
+            token_data = _json(response)
             self.access_token = token_data['access_token']
+            self.headers = {
+                'Authorization': f'Bearer {self.access_token}',
+                'Content-Type': 'application/json'
+            }
             logger.info("Successfully obtained Spotify access token")
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Error getting access token: {e}")
             raise
     
-    def get_headers(self):
-        """Get headers with authorization for API requests."""
-        return {
-            'Authorization': f'Bearer {self.access_token}',
-            'Content-Type': 'application/json'
-        }
-    
     def extract_playlist_id(self, playlist_url):
         """
         Extract playlist ID from Spotify URL.
@@ -117,66 +376,136 @@ class SpotifyPlaylistIndexer:
             dict: Playlist data
         """
         url = f"{self.base_url}/playlists/{playlist_id}"
+        params = {
+            'fields': PLAYLIST_FIELDS
+        }
         
         try:
-            response = requests.get(url, headers=self.get_headers())
+            response = self._api_request('GET', url, params=params)
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            return _json(response)
+        except httpx.HTTPError as e:
             logger.error(f"Error fetching playlist details: {e}")
             return None
     
-    def get_playlist_tracks(self, playlist_id):
+    def get_tracks_page(self, playlist_id, offset):
         """
-        Get all tracks from a playlist (handles pagination).
+        Get one page of a playlist's tracks.
         
         Args:
             playlist_id (str): Spotify playlist ID
+            offset (int): Index of the first track in the page
             
         Returns:
-            list: List of track data
+            dict: Page data or None if failed
         """
         url = f"{self.base_url}/playlists/{playlist_id}/tracks"
-        all_tracks = []
-        
         params = {
-            'limit': 100,  # Maximum per request
-            'offset': 0
+            'limit': TRACKS_PAGE_SIZE,
+            'offset': offset,
+            'fields': TRACKS_PAGE_FIELDS
         }
         
-        while True:
-            try:
-                response = requests.get(url, headers=self.get_headers(), params=params)
-                response.raise_for_status()
-                
-                data = response.json()
-                tracks = data.get('items', [])
-                
-                if not tracks:
-                    break
-                
-                all_tracks.extend(tracks)
-                
-                # Check if there are more tracks
-                if data.get('next') is None:
+        try:
+            response = self._api_request('GET', url, params=params)
+            response.raise_for_status()
+            return _json(response)
+        except httpx.HTTPError as e:
+            logger.error(f"Error fetching tracks at offset {offset}: {e}")
+            return None
+    
+    def iter_playlist_tracks(self, playlist_id, first_page=None):
+        """
+        Yield all track items of a playlist in order (handles pagination).
+        
+        The first page reports the playlist's total track count, so the
+        remaining pages are fetched concurrently (still through the rate limiter)
+        while earlier items are being consumed.
+        
+        Args:
+            playlist_id (str): Spotify playlist ID
+            first_page (dict): First tracks page if already known, e.g. the
+                               one embedded in get_playlist_details' response
+            
+        Yields:
+            dict: Track item data
+        """
+        if first_page is None:
+            first_page = self.get_tracks_page(playlist_id, 0)
+        if not first_page:
+            return
+        
+        first_items = first_page.get('items', [])
+        total = first_page.get('total') or 0
+        offsets = range(len(first_items), total, TRACKS_PAGE_SIZE)
+        
+        if not (first_page.get('next') and first_items and offsets):
+            yield from first_items
+            return
+        
+        with ThreadPoolExecutor(max_workers=PAGE_FETCH_WORKERS) as executor:
+            # map() submits every page up front and yields them in offset order
+            pages = executor.map(lambda offset: self.get_tracks_page(playlist_id, offset), offsets)
+            yield from first_items
+            
+            for page in pages:
+                if not page:
                     break
-                
-                params['offset'] += 100
-                logger.info(f"Retrieved {len(all_tracks)} tracks so far...")
-                
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Error fetching tracks: {e}")
-                break
+                yield from page.get('items', [])
+    
+    def get_playlist_tracks(self, playlist_id, first_page=None):
+        """
+        Get all tracks from a playlist (handles pagination).
         
+        Args:
+            playlist_id (str): Spotify playlist ID
+            first_page (dict): First tracks page if already known
+            
+        Returns:
+            list: List of track data
+        """
+        all_tracks = list(self.iter_playlist_tracks(playlist_id, first_page))
+        logger.info(f"Retrieved {len(all_tracks)} tracks")
         return all_tracks
     
-    def download_artwork(self, artwork_url, filename):
+    def load_artwork_meta(self):
+        """
+        Load the artwork sidecar recording where each image was downloaded from.
+        
+        Returns:
+            dict: Mapping of image filename to {'url'}
+        """
+        return _load_json_sidecar(self.artwork_meta_path)
+    
+    def scan_images(self):
         """
-        Download artwork image from URL if it doesn't already exist.
+        Snapshot the names of the images on disk with a single directory scan.
+        
+        Returns:
+            frozenset: Filenames in the images directory
+        """
+        with os.scandir(self.images_dir) as entries:
+            return frozenset(entry.name for entry in entries)
+    
+    def save_artwork_meta(self):
+        """Atomically write the artwork sidecar."""
+        _write_json_atomic(self.artwork_meta_path, self.artwork_meta)
+    
+    def download_artwork(self, artwork_url, filename, existing_images=None):
+        """
+        Download artwork image from URL unless an up-to-date copy already exists.
+        
+        An existing image is kept if it was downloaded from the same URL; Spotify
+        image URLs are content-addressed, so a new URL means the artwork changed.
+        Images from before the sidecar existed are kept. Given a scan_images()
+        snapshot, existence is checked against it without a stat(); images are
+        moved into place atomically, so a listed file is always complete.
         
         Args:
             artwork_url (str): Artwork URL
             filename (str): Local filename to save
+            existing_images (frozenset): Snapshot from scan_images(); without
+                                         one the file is checked on disk
             
         Returns:
             str: Local file path or None if failed
@@ -185,28 +514,52 @@ class SpotifyPlaylistIndexer:
             return None
         
         file_path = self.images_dir / filename
+        meta = self.artwork_meta.get(filename)
         
         # Check if file already exists
-        if file_path.exists():
-            logger.info(f"Artwork already exists, skipping download: {filename}")
-            return str(file_path)
+        if existing_images is None:
+            on_disk = file_path.exists()
+        else:
+            on_disk = filename in existing_images
+        
+        if on_disk:
+            if meta is None or meta['url'] == artwork_url:
+                logger.info(f"Artwork already exists, skipping download: {filename}")
+                return str(file_path)
             
+            logger.info(f"Artwork changed, downloading again: {filename}")
+        
+        # Download to a temporary file so an interrupted download never
+        # leaves a truncated image under the final name
+        part_path = file_path.with_name(f"{filename}.{uuid.uuid4().hex}.part")
+        
         try:
-            response = requests.get(artwork_url, timeout=30)
-            response.raise_for_status()
+            with open(part_path, 'wb') as f:
+                # The artwork CDN doesn't need (or get) the access token.
+                # Stream the body straight to disk instead of buffering it.
+                response = self._request('GET', artwork_url, stream=True)
+                try:
+                    response.raise_for_status()
+                    for chunk in response.iter_bytes(chunk_size=64 * 1024):
+                        f.write(chunk)
+                finally:
+                    response.close()
             
-            with open(file_path, 'wb') as f:
-                f.write(response.content)
+            os.replace(part_path, file_path)
+            self.artwork_meta[filename] = {'url': artwork_url}
             
             logger.info(f"Downloaded artwork: {filename}")
             return str(file_path)
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Error downloading artwork {filename}: {e}")
+            part_path.unlink(missing_ok=True)
             return None
     
     def process_track(self, track_item, track_index):
         """
-        Process individual track data and download artwork.
+        Process individual track data into metadata.
+        
+        Artwork is downloaded separately by index_playlist.
         
         Args:
             track_item (dict): Track item from API (includes track + added info)
@@ -215,67 +568,26 @@ class SpotifyPlaylistIndexer:
         Returns:
             dict: Processed track metadata
         """
-        track_data = track_item.get('track', {})
-        
-        # Handle local tracks or None tracks
-        if not track_data or track_data.get('type') != 'track':
-            return None
-        
-        # Extract artist names
-        artists = track_data.get('artists', [])
-        artist_names = [artist.get('name', '') for artist in artists]
-        primary_artist = artist_names[0] if artist_names else 'Unknown Artist'
-        
-        # Extract album info
-        album = track_data.get('album', {})
-        album_name = album.get('name', 'Unknown Album')
-        
-        # Get the largest artwork image
-        album_images = album.get('images', [])
-        artwork_url = album_images[0].get('url') if album_images else None
-        
-        # Extract other metadata
-        track_info = {
-            'index': track_index,
-            'id': track_data.get('id'),
-            'name': track_data.get('name'),
-            'artist_name': primary_artist,
-            'all_artists': artist_names,
-            'album_name': album_name,
-            'album_id': album.get('id'),
-            'duration_ms': track_data.get('duration_ms'),
-            'explicit': track_data.get('explicit', False),
-            'popularity': track_data.get('popularity', 0),
-            'track_number': track_data.get('track_number'),
-            'disc_number': track_data.get('disc_number'),
-            'release_date': album.get('release_date'),
-            'release_date_precision': album.get('release_date_precision'),
-            'album_type': album.get('album_type'),
-            'total_tracks': album.get('total_tracks'),
-            'external_urls': track_data.get('external_urls', {}),
-            'preview_url': track_data.get('preview_url'),
-            'spotify_url': track_data.get('external_urls', {}).get('spotify'),
-            'added_at': track_item.get('added_at'),
-            'added_by': track_item.get('added_by', {}).get('id'),
-            'artwork_url': artwork_url,
-            'artwork_local_path': None
-        }
+        return _extract_track(track_item, track_index)
+    
+    def artwork_filename(self, track_info):
+        """
+        Build a filesystem-safe artwork filename for a processed track.
         
-        # Download artwork if available
-        if artwork_url:
-            # Create safe filename
-            safe_name = f"{track_index:03d}_{primary_artist}_{track_info['name']}"
-            safe_name = re.sub(r'[^\w\s-]', '', safe_name)  # Remove special chars
-            safe_name = re.sub(r'[-\s]+', '_', safe_name)  # Replace spaces/hyphens with underscores
-            safe_name = safe_name[:100]  # Limit filename length
-            artwork_filename = f"{safe_name}.jpg"
+        Args:
+            track_info (dict): Processed track metadata
             
-            # Download artwork
-            local_path = self.download_artwork(artwork_url, artwork_filename)
-            if local_path:
-                track_info['artwork_local_path'] = local_path
-        
-        return track_info
+        Returns:
+            str: Artwork filename
+        """
+        safe_name = f"{track_info['index']:03d}_{track_info['artist_name']}_{track_info['name']}"
+        if safe_name.isascii():
+            safe_name = safe_name.translate(_SANITIZE_BAD_ASCII)  # Remove special chars
+        else:
+            safe_name = _SANITIZE_BAD.sub('', safe_name)
+        safe_name = _SANITIZE_WS.sub('_', safe_name)  # Replace spaces/hyphens with underscores
+        safe_name = safe_name[:100]  # Limit filename length
+        return f"{safe_name}.jpg"
     
     def get_audio_features(self, track_ids):
         """
@@ -302,10 +614,10 @@ class SpotifyPlaylistIndexer:
             params = {'ids': ids_param}
             
             try:
-                response = requests.get(url, headers=self.get_headers(), params=params)
+                response = self._api_request('GET', url, params=params)
                 response.raise_for_status()
                 
-                data = response.json()
+                data = _json(response)
                 features_list = data.get('audio_features', [])
                 
                 for features in features_list:
@@ -314,50 +626,128 @@ class SpotifyPlaylistIndexer:
                 
                 logger.info(f"Retrieved audio features for {len(chunk_ids)} tracks")
                 
-            except requests.exceptions.RequestException as e:
+            except httpx.HTTPError as e:
                 logger.error(f"Error fetching audio features: {e}")
         
         return all_features
     
-    def convert_to_json_serializable(self, obj):
+    def save_tracks_parquet(self, processed_tracks, tracks_path):
+        """
+        Write processed tracks to a Parquet file.
+        
+        The DataFrame is built from column lists rather than per-track records.
+        Low-cardinality text columns are stored as categoricals, which Parquet
+        dictionary-encodes.
+        
+        Args:
+            processed_tracks (list): Processed track metadata dicts
+            tracks_path (Path): Output file path
+        """
+        import pandas as pd  # Only needed for Parquet output
+        
+        tracks_df = pd.DataFrame(_track_columns(processed_tracks))
+        if not tracks_df.empty:  # An empty playlist has no columns to convert
+            tracks_df = tracks_df.astype({
+                'artist_name': 'category',
+                'album_name': 'category',
+                'album_type': 'category'
+            })
+        tracks_df.to_parquet(tracks_path, engine='pyarrow', compression='zstd', index=False)
+        logger.info(f"Saved {len(tracks_df)} tracks to: {tracks_path}")
+    
+    def save_playlist_json(self, final_data, json_path):
+        """
+        Write playlist data as JSON, streaming the tracks one per line.
+        
+        Each track is serialized and written on its own, so the whole document
+        is never built in memory; the file is still a single JSON object.
+        
+        Args:
+            final_data (dict): Playlist metadata, tracks (or tracks_file) and summary
+            json_path (Path): Output file path
+        """
+        # orjson serializes natively (including any numpy scalars) and emits UTF-8
+        option = orjson.OPT_SERIALIZE_NUMPY
+        
+        with open(json_path, 'wb') as f:
+            f.write(b'{')
+            for i, (key, value) in enumerate(final_data.items()):
+                f.write(b',\n  ' if i else b'\n  ')
+                f.write(orjson.dumps(key) + b': ')
+                
+                if key == 'tracks':
+                    f.write(b'[')
+                    for j, track in enumerate(value):
+                        f.write(b',\n    ' if j else b'\n    ')
+                        f.write(orjson.dumps(track, option=option))
+                    f.write(b'\n  ]' if value else b']')
+                else:
+                    f.write(orjson.dumps(value, option=option))
+            f.write(b'\n}\n')
+    
+    def get_cached_output(self, playlist_id, snapshot_id):
         """
-        Convert numpy/pandas types to JSON-serializable Python types.
+        Look up the output of an earlier run for the same playlist snapshot.
+        
+        Spotify changes a playlist's snapshot_id whenever it is edited, so a
+        matching entry means the playlist hasn't changed since that run.
         
         Args:
-            obj: Object to convert
+            playlist_id (str): Spotify playlist ID
+            snapshot_id (str): Current snapshot ID of the playlist
             
         Returns:
-            JSON-serializable object
-        """
-        if isinstance(obj, (pd.Series, pd.DataFrame)):
-            return obj.to_dict('records') if isinstance(obj, pd.DataFrame) else obj.to_dict()
-        elif isinstance(obj, (pd.Int64Dtype, pd.Float64Dtype)):
-            return obj.item()
-        elif hasattr(obj, 'dtype'):
-            # Handle numpy/pandas scalar types
-            if pd.isna(obj):
-                return None
-            elif 'int' in str(obj.dtype):
-                return int(obj)
-            elif 'float' in str(obj.dtype):
-                return float(obj)
-            elif 'bool' in str(obj.dtype):
-                return bool(obj)
-            else:
-                return str(obj)
-        elif isinstance(obj, dict):
-            return {k: self.convert_to_json_serializable(v) for k, v in obj.items()}
-        elif isinstance(obj, (list, tuple)):
-            return [self.convert_to_json_serializable(item) for item in obj]
-        else:
-            return obj
+            str: Path to the earlier JSON file, or None if it must be re-indexed
+        """
+        with self._snapshot_lock:
+            entry = _load_json_sidecar(self.snapshot_cache_path).get(playlist_id)
+        
+        if (not entry or not snapshot_id
+                or entry['snapshot_id'] != snapshot_id
+                or entry['tracks_format'] != self.tracks_format):
+            return None
+        
+        # Parquet runs also need the tracks file written next to the JSON
+        output_path = Path(entry['output_path'])
+        outputs = [output_path]
+        if self.tracks_format == 'parquet':
+            outputs.append(output_path.with_suffix('.parquet'))
+        if not all(path.exists() for path in outputs):
+            return None
+        
+        return entry['output_path']
+    
+    def save_cached_output(self, playlist_id, snapshot_id, output_path):
+        """
+        Record the output of this run for the playlist snapshot.
+        
+        Args:
+            playlist_id (str): Spotify playlist ID
+            snapshot_id (str): Snapshot ID of the indexed playlist
+            output_path (str): Path to the saved JSON file
+        """
+        if not snapshot_id:
+            return
+        
+        with self._snapshot_lock:
+            cache = _load_json_sidecar(self.snapshot_cache_path)
+            cache[playlist_id] = {
+                'snapshot_id': snapshot_id,
+                'tracks_format': self.tracks_format,
+                'output_path': output_path
+            }
+            _write_json_atomic(self.snapshot_cache_path, cache)
     
-    def index_playlist(self, playlist_url):
+    def index_playlist(self, playlist_url, force=False):
         """
         Index entire playlist and save metadata.
         
+        A playlist whose snapshot hasn't changed since it was last indexed is
+        skipped, returning the earlier output, unless force is set.
+        
         Args:
             playlist_url (str): Spotify playlist URL
+            force (bool): Re-index even if the playlist is unchanged
             
         Returns:
             str: Path to saved JSON file
@@ -378,6 +768,13 @@ class SpotifyPlaylistIndexer:
             logger.error("Could not fetch playlist data")
             return None
         
+        snapshot_id = playlist_data.get('snapshot_id')
+        if not force:
+            cached_path = self.get_cached_output(playlist_id, snapshot_id)
+            if cached_path:
+                logger.info(f"Playlist unchanged since last run, skipping: {cached_path}")
+                return cached_path
+        
         # Extract playlist metadata
         playlist_metadata = {
             'id': playlist_data.get('id'),
@@ -391,25 +788,71 @@ class SpotifyPlaylistIndexer:
             'track_count': playlist_data.get('tracks', {}).get('total'),
             'url': playlist_url,
             'spotify_url': playlist_data.get('external_urls', {}).get('spotify'),
-            'snapshot_id': playlist_data.get('snapshot_id')
+            'snapshot_id': snapshot_id
         }
         
         logger.info(f"Playlist: {playlist_metadata['name']} ({playlist_metadata['track_count']} tracks)")
         
-        # Get all tracks
-        tracks_data = self.get_playlist_tracks(playlist_id)
         processed_tracks = []
         
-        for index, track_item in enumerate(tracks_data, 1):
-            track_name = track_item.get('track', {}).get('name', 'Unknown')
-            logger.info(f"Processing track {index}/{len(tracks_data)}: {track_name}")
+        # Summary statistics, accumulated while processing
+        total_duration = 0
+        primary_artists = set()
+        all_artist_names = set()  # Including collaborations
+        albums = set()
+        popularity_sum = 0
+        popularity_count = 0
+        explicit_tracks = 0
+        tracks_with_preview = 0
+        
+        # Local to this run: the indexer may be shared by concurrent runs
+        existing_images = self.scan_images()
+        
+        # Tracks are processed as their pages arrive and each artwork download
+        # starts right away, overlapping the remaining page fetches
+        items_fetched = 0
+        artwork_failures = 0
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            artwork_futures = {}
+            tracks_data = self.iter_playlist_tracks(playlist_id, playlist_data.get('tracks'))
             
-            track_info = self.process_track(track_item, index)
-            if track_info:  # Skip None tracks (local files, etc.)
+            for index, track_item in enumerate(tracks_data, 1):
+                items_fetched = index
+                track_info = _extract_track(track_item, index)
+                if not track_info:  # Skip None tracks (local files, etc.)
+                    continue
+                
                 processed_tracks.append(track_info)
+                
+                if track_info['artwork_url']:
+                    future = executor.submit(self.download_artwork, track_info['artwork_url'],
+                                             self.artwork_filename(track_info), existing_images)
+                    artwork_futures[future] = track_info
+                
+                total_duration += track_info['duration_ms'] or 0
+                primary_artists.add(track_info['artist_name'])
+                all_artist_names.update(track_info['all_artists'])
+                if track_info['album_name'] is not None:
+                    albums.add(track_info['album_name'])
+                if track_info['popularity'] is not None:
+                    popularity_sum += track_info['popularity']
+                    popularity_count += 1
+                if track_info['explicit']:
+                    explicit_tracks += 1
+                if track_info['preview_url'] is not None:
+                    tracks_with_preview += 1
             
-            # Small delay to be respectful (reduced since no audio features)
-            time.sleep(0.02)
+            logger.info(f"Processed {len(processed_tracks)} tracks, waiting for {len(artwork_futures)} artwork downloads...")
+            
+            for future in as_completed(artwork_futures):
+                local_path = future.result()
+                if local_path:
+                    artwork_futures[future]['artwork_local_path'] = local_path
+                else:
+                    artwork_failures += 1
+        
+        self.save_artwork_meta()
         
         # Audio features disabled for faster processing
         # Uncomment the following lines if you want audio features:
@@ -437,60 +880,68 @@ class SpotifyPlaylistIndexer:
         #             'time_signature': features.get('time_signature')
         #         }
         
-        # Create DataFrame
-        df = pd.DataFrame(processed_tracks)
-        
-        # Calculate summary statistics
-        total_duration = df['duration_ms'].sum()
-        unique_artists = df['artist_name'].nunique()
-        unique_albums = df['album_name'].nunique()
+        json_filename = f"spotify_playlist_{playlist_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        json_path = self.data_dir / json_filename
         
-        # Extract all artists (including collaborations)
-        all_artist_names = []
-        for artists_list in df['all_artists']:
-            all_artist_names.extend(artists_list)
-        unique_all_artists = len(set(all_artist_names))
+        if self.tracks_format == 'parquet':
+            tracks_path = json_path.with_suffix('.parquet')
+            self.save_tracks_parquet(processed_tracks, tracks_path)
+            tracks_output = {'tracks_file': tracks_path.name}
+        else:
+            tracks_output = {'tracks': processed_tracks}
         
-        # Prepare final data structure (converting numpy/pandas types to Python types for JSON serialization)
+        # Prepare final data structure
         final_data = {
             'playlist_metadata': playlist_metadata,
-            'tracks': self.convert_to_json_serializable(df.to_dict('records')),
+            **tracks_output,
             'summary': {
                 'total_tracks': len(processed_tracks),
-                'total_duration_ms': int(total_duration),
-                'total_duration_hours': float(total_duration / (1000 * 60 * 60)),
-                'unique_primary_artists': int(unique_artists),
-                'unique_all_artists': int(unique_all_artists),
-                'unique_albums': int(unique_albums),
-                'average_popularity': float(df['popularity'].mean()),
-                'explicit_tracks': int(df['explicit'].sum()),
-                'tracks_with_preview': int(df['preview_url'].notna().sum()),
-                'indexed_at': pd.Timestamp.now().isoformat()
+                'total_duration_ms': total_duration,
+                'total_duration_hours': total_duration / (1000 * 60 * 60),
+                'unique_primary_artists': len(primary_artists),
+                'unique_all_artists': len(all_artist_names),
+                'unique_albums': len(albums),
+                'average_popularity': popularity_sum / popularity_count if popularity_count else None,
+                'explicit_tracks': explicit_tracks,
+                'tracks_with_preview': tracks_with_preview,
+                'indexed_at': datetime.now().isoformat()
                 # Audio features summary disabled - uncomment if you enable audio features above
+                # (requires `from statistics import fmean`)
                 # 'audio_features_summary': {
-                #     'avg_danceability': float(df['audio_features'].apply(lambda x: x.get('danceability') if x else None).mean()),
-                #     'avg_energy': float(df['audio_features'].apply(lambda x: x.get('energy') if x else None).mean()),
-                #     'avg_valence': float(df['audio_features'].apply(lambda x: x.get('valence') if x else None).mean()),
-                #     'avg_tempo': float(df['audio_features'].apply(lambda x: x.get('tempo') if x else None).mean())
-                # } if any(df['audio_features'].notna()) else None
+                #     key: fmean(t['audio_features'][feature] for t in processed_tracks
+                #                if t.get('audio_features') and t['audio_features'].get(feature) is not None)
+                #     for key, feature in [('avg_danceability', 'danceability'), ('avg_energy', 'energy'),
+                #                          ('avg_valence', 'valence'), ('avg_tempo', 'tempo')]
+                # } if any(t.get('audio_features') for t in processed_tracks) else None
             }
         }
         
         # Save to JSON
-        json_filename = f"spotify_playlist_{playlist_id}_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.json"
-        json_path = self.data_dir / json_filename
-        
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(final_data, f, indent=2, ensure_ascii=False)
+        self.save_playlist_json(final_data, json_path)
         
         logger.info(f"Saved playlist data to: {json_path}")
         logger.info(f"Downloaded {len([t for t in processed_tracks if t['artwork_local_path']])} artwork images")
         
+        # Only a complete run may be reused; otherwise the next run retries
+        # the missing pages and images
+        if items_fetched != playlist_metadata['track_count']:
+            logger.warning(f"Fetched {items_fetched} of {playlist_metadata['track_count']} tracks; "
+                           f"the playlist will be re-indexed on the next run")
+        elif artwork_failures:
+            logger.warning(f"{artwork_failures} artwork downloads failed; "
+                           f"the playlist will be re-indexed on the next run")
+        else:
+            self.save_cached_output(playlist_id, snapshot_id, str(json_path))
+        
         return str(json_path)
 
 def load_spotify_keys(keys_file='keys.txt'):
     """
-    Load Spotify API keys from a file.
+    Load Spotify API keys from the environment, falling back to a keys file.
+    
+    The SPOTIFY_CLIENT_ID and SPOTIFY_SECRET environment variables take
+    precedence; otherwise they are read from KEY=value lines in keys_file
+    (blank lines and '#' comments are ignored).
     
     Args:
         keys_file (str): Path to the keys file
@@ -498,36 +949,41 @@ def load_spotify_keys(keys_file='keys.txt'):
     Returns:
         tuple: (client_id, client_secret) or (None, None) if failed
     """
+    client_id = os.environ.get('SPOTIFY_CLIENT_ID')
+    client_secret = os.environ.get('SPOTIFY_SECRET')
+    
+    if client_id and client_secret:
+        logger.info("Successfully loaded Spotify API credentials from environment")
+        return client_id, client_secret
+    
     try:
-        keys = {}
         with open(keys_file, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line and '=' in line:
-                    key, value = line.split('=', 1)
-                    keys[key.strip()] = value.strip()
-        
-        client_id = keys.get('SPOTIFY_CLIENT_ID')
-        client_secret = keys.get('SPOTIFY_SECRET')
-        
-        if client_id and client_secret:
-            logger.info("Successfully loaded Spotify API credentials from keys.txt")
-            return client_id, client_secret
-        else:
-            logger.error("Missing SPOTIFY_CLIENT_ID or SPOTIFY_SECRET in keys.txt")
-            return None, None
-            
+            keys = {
+                key.strip(): value.strip()
+                for key, sep, value in (line.partition('=') for line in f if not line.lstrip().startswith('#'))
+                if sep
+            }
     except FileNotFoundError:
-        logger.error(f"Keys file '{keys_file}' not found")
+        logger.error(f"Keys file '{keys_file}' not found and SPOTIFY_CLIENT_ID/SPOTIFY_SECRET not set")
         return None, None
-    except Exception as e:
+    except OSError as e:
         logger.error(f"Error reading keys file: {e}")
         return None, None
+    
+    client_id = client_id or keys.get('SPOTIFY_CLIENT_ID')
+    client_secret = client_secret or keys.get('SPOTIFY_SECRET')
+    
+    if client_id and client_secret:
+        logger.info(f"Successfully loaded Spotify API credentials from {keys_file}")
+        return client_id, client_secret
+    
+    logger.error(f"Missing SPOTIFY_CLIENT_ID or SPOTIFY_SECRET in {keys_file}")
+    return None, None
 
 def main():
     """Main function to run the playlist indexer."""
     
-    # Load Spotify API credentials from keys.txt
+    # Load Spotify API credentials from the environment or keys.txt
     CLIENT_ID, CLIENT_SECRET = load_spotify_keys()
     
     # Example playlist URL - replace with your desired playlist
@@ -535,23 +991,22 @@ def main():
     
     # Check if credentials were loaded successfully
     if not CLIENT_ID or not CLIENT_SECRET:
-        print("ERROR: Could not load Spotify API credentials from keys.txt")
-        print("\nMake sure keys.txt exists with the following format:")
+        print("ERROR: Could not load Spotify API credentials")
+        print("\nSet the SPOTIFY_CLIENT_ID and SPOTIFY_SECRET environment variables,")
+        print("or make sure keys.txt exists with the following format:")
         print("SPOTIFY_CLIENT_ID=your_client_id_here")
         print("SPOTIFY_SECRET=your_client_secret_here")
         print("\nTo get your credentials:")
         print("1. Go to https://developer.spotify.com/dashboard")
         print("2. Create a new app (any name/description)")
         print("3. Copy the Client ID and Client Secret")
-        print("4. Add them to keys.txt")
+        print("4. Export them or add them to keys.txt")
         return
     
     try:
-        # Create indexer instance
-        indexer = SpotifyPlaylistIndexer(CLIENT_ID, CLIENT_SECRET)
-        
-        # Index the playlist
-        result_path = indexer.index_playlist(PLAYLIST_URL)
+        # Create indexer instance and index the playlist
+        with SpotifyPlaylistIndexer(CLIENT_ID, CLIENT_SECRET) as indexer:
+            result_path = indexer.index_playlist(PLAYLIST_URL)
         
         if result_path:
             print(f"\n✅ Successfully indexed playlist!")